@@ -1,24 +1,81 @@
+import functools
+import json
 import yaml
 import os
+import re
 from .models import Server
 
+try:
+    from yaml import CSafeLoader as _Loader
+except ImportError:
+    from yaml import SafeLoader as _Loader
+
+def _load_json_cache(cache_path, mtime, size):
+    try:
+        with open(cache_path, 'r') as cache_file:
+            cached = json.load(cache_file)
+    except (OSError, ValueError):
+        return None
+    if isinstance(cached, dict) and cached.get('mtime') == mtime and cached.get('size') == size:
+        return cached.get('data')
+    return None
+
+def _write_json_cache(cache_path, mtime, size, data):
+    tmp_path = f"{cache_path}.tmp"
+    try:
+        # the sidecar holds every server's api_key, so it is created owner-only
+        # regardless of umask; a leftover tmp file may carry looser bits
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, 'w') as cache_file:
+            json.dump({'mtime': mtime, 'size': size, 'data': data}, cache_file)
+        os.replace(tmp_path, cache_path)
+    except (OSError, TypeError, ValueError):
+        # the sidecar is only an optimisation; read-only mounts or values
+        # JSON can't represent just mean we parse the YAML next time too
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+@functools.lru_cache(maxsize=8)
+def _parse_yaml(path, mtime, size):
+    cache_path = f"{path}.cache.json"
+    data = _load_json_cache(cache_path, mtime, size)
+    if data is not None:
+        return data
+    with open(path, 'r') as config_file:
+        data = yaml.load(config_file, Loader=_Loader) or {}
+    _write_json_cache(cache_path, mtime, size, data)
+    return data
+
+_SERVER_ENV_RE = re.compile(r'^SERVER([1-9]\d*)_(URL|API_KEY)$')
+
 class Config:
+    __slots__ = ('config', 'SERVERS', 'SYNC_INTERVAL', 'DB_PATH', 'LOG_LEVEL', 'SYNC_REVERSE_ZONES', 'ZONES_TO_SYNC', 'SYNC_WORKERS')
+
+    _instances = {}
+
     def __init__(self, config_path='config.yaml'):
         self.config = {}
         if os.path.exists(config_path):
-            with open(config_path, 'r') as config_file:
-                self.config = yaml.safe_load(config_file) or {}
+            stat = os.stat(config_path)
+            self.config = _parse_yaml(config_path, stat.st_mtime_ns, stat.st_size)
 
         # env override
-        self.SERVERS = self._get_servers()
+        self.SERVERS = tuple(self._get_servers())
         self.SYNC_INTERVAL = int(os.getenv('SYNC_INTERVAL', self.config.get('sync_interval', 300)))
+        self.SYNC_WORKERS = int(os.getenv('SYNC_WORKERS', self.config.get('sync_workers', 8)))
         
         self.DB_PATH = os.getenv('DB_PATH', './data/dns_sync.db')
         
         self.LOG_LEVEL = os.getenv('LOG_LEVEL', self.config.get('log_level', 'INFO'))
         self.SYNC_REVERSE_ZONES = os.getenv('SYNC_REVERSE_ZONES', str(self.config.get('sync_reverse_zones', False))).lower() == 'true'
         self.ZONES_TO_SYNC = os.getenv('ZONES_TO_SYNC', ','.join(self.config.get('zones_to_sync', []))).split(',')
-        self.ZONES_TO_SYNC = [zone.strip() for zone in self.ZONES_TO_SYNC if zone.strip()]
+        self.ZONES_TO_SYNC = frozenset(zone.strip() for zone in self.ZONES_TO_SYNC if zone.strip())
 
         self.validate_config()
 
@@ -28,14 +85,21 @@ class Config:
         for server in yaml_servers:
             servers.append(Server(server['name'], server['url'], server['api_key']))
 
+        env_servers = {}
+        for key, value in os.environ.items():
+            match = _SERVER_ENV_RE.match(key)
+            if match:
+                env_servers.setdefault(int(match.group(1)), {})[match.group(2)] = value
+
+        servers_by_name = {s.name: s for s in servers}
         i = 1
         while True:
-            url = os.getenv(f"SERVER{i}_URL")
-            api_key = os.getenv(f"SERVER{i}_API_KEY")
+            url = env_servers.get(i, {}).get('URL')
+            api_key = env_servers.get(i, {}).get('API_KEY')
             if not url or not api_key:
                 break
             server_name = f"server{i}"
-            existing_server = next((s for s in servers if s.name == server_name), None)
+            existing_server = servers_by_name.get(server_name)
             if existing_server:
                 existing_server.url = url
                 existing_server.api_key = api_key
@@ -53,10 +117,20 @@ class Config:
                 raise ValueError(f"Invalid configuration for server {server.name}")
         if self.SYNC_INTERVAL <= 0:
             raise ValueError("SYNC_INTERVAL must be a positive integer")
+        if self.SYNC_WORKERS <= 0:
+            raise ValueError("SYNC_WORKERS must be a positive integer")
 
     @classmethod
     def load(cls):
         config_path = os.environ.get('CONFIG_PATH', 'config.yaml')
-        return cls(config_path)
+        if config_path not in cls._instances:
+            cls._instances[config_path] = cls(config_path)
+        return cls._instances[config_path]
+
+    @classmethod
+    def reload(cls):
+        _parse_yaml.cache_clear()
+        cls._instances.clear()
+        return cls.load()
 
 config = Config.load()
\ No newline at end of file
@@ -1,40 +1,129 @@
 import sqlite3
 import json
-from datetime import datetime, timezone
-from .models import DNSRecord, ZoneOwnership
+import time
+from contextlib import contextmanager
+from .models import DNSRecord, ZoneOwnership, canonical_rdata, rdata_digest
+
+SCHEMA_VERSION = 5
+
+# stays under SQLITE_MAX_VARIABLE_NUMBER on builds older than 3.32 (999)
+MAX_QUERY_PARAMS = 500
+
+INSERT_RECORD_SQL = '''
+    INSERT OR REPLACE INTO dns_records
+    (server, zone, name, type, ttl, rdata, rdata_hash, created_at, updated_at, last_operation)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+DELETE_RECORD_SQL = '''
+    UPDATE dns_records
+    SET updated_at = ?, last_operation = 'DELETE'
+    WHERE server = ? AND zone = ? AND name = ? AND type = ?
+'''
 
 class DatabaseManager:
     def __init__(self, db_path):
         self.db_path = db_path
         self.conn = None
         self.cursor = None
+        self._transaction_depth = 0
         self.connect()
         self.check_and_create_tables()
 
     def connect(self):
-        self.conn = sqlite3.connect(self.db_path)
+        if self.db_path == ':memory:':
+            # a named shared-cache database stays alive for as long as any
+            # connection in this process has it open
+            self.conn = sqlite3.connect("file:technisync?mode=memory&cache=shared", uri=True)
+        else:
+            self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+        self.conn.execute("PRAGMA mmap_size=268435456")
         self.cursor = self.conn.cursor()
 
+    @contextmanager
+    def transaction(self):
+        # the outermost block takes the write lock up front and commits;
+        # nested blocks run in a savepoint so a failure only undoes their
+        # own writes
+        depth = self._transaction_depth
+        savepoint = f"technisync_{depth}"
+        if depth:
+            self.conn.execute(f"SAVEPOINT {savepoint}")
+        elif not self.conn.in_transaction:
+            self.conn.execute("BEGIN IMMEDIATE")
+        self._transaction_depth += 1
+        try:
+            yield self.cursor
+        except Exception:
+            if depth:
+                self.conn.execute(f"ROLLBACK TO {savepoint}")
+                self.conn.execute(f"RELEASE {savepoint}")
+            else:
+                self.conn.rollback()
+            raise
+        else:
+            if depth:
+                self.conn.execute(f"RELEASE {savepoint}")
+            else:
+                self.conn.commit()
+        finally:
+            self._transaction_depth -= 1
+
     def check_and_create_tables(self):
-        self.check_and_create_dns_records_table()
+        self.cursor.execute("PRAGMA user_version")
+        version = self.cursor.fetchone()[0]
+        if version == SCHEMA_VERSION:
+            return
+
         self.check_and_create_zone_ownership_table()
-        self.check_and_create_zone_sync_table()
+        self.check_and_create_zone_sync_table(version)
+        self.check_and_create_dns_records_table(version)
+
+    def check_and_create_dns_records_table(self, version):
+        if version < 1:
+            # databases from before user_version was tracked already carry
+            # the full column set, so only the indexes are new to them
+            self.create_dns_records_table()
+            self.create_dns_records_indexes()
+
+        if version < 2:
+            # rdata is now stored in canonical form so it can be compared
+            # without decoding; rewrite rows stored by older versions
+            self.cursor.execute("SELECT id, rdata FROM dns_records")
+            rows = [(canonical_rdata(json.loads(rdata)), row_id) for row_id, rdata in self.cursor.fetchall()]
+            self.cursor.executemany("UPDATE dns_records SET rdata = ? WHERE id = ?", rows)
 
-    def check_and_create_dns_records_table(self):
-        self.cursor.execute("PRAGMA table_info(dns_records)")
-        columns = [column[1] for column in self.cursor.fetchall()]
-        
-        required_columns = ['id', 'server', 'zone', 'name', 'type', 'ttl', 'rdata', 'created_at', 'updated_at', 'last_operation']
-        
-        if set(required_columns).issubset(set(columns)):
-            return  
+        if version < 3:
+            # timestamps are now integer nanoseconds since the epoch instead
+            # of text produced by sqlite3's default datetime adapter
+            for table, column in (
+                ('dns_records', 'created_at'),
+                ('dns_records', 'updated_at'),
+                ('zone_ownership', 'created_at'),
+                ('zone_sync', 'last_synced'),
+            ):
+                self.cursor.execute(f'''
+                    UPDATE {table}
+                    SET {column} = CAST(ROUND((julianday({column}) - 2440587.5) * 86400000) AS INTEGER) * 1000000
+                    WHERE typeof({column}) = 'text'
+                ''')
 
-        self.cursor.execute("DROP TABLE IF EXISTS dns_records")
-        self.create_dns_records_table()
+        if version < 4:
+            # records are diffed on a 64-bit digest of their canonical rdata
+            self.cursor.execute("ALTER TABLE dns_records ADD COLUMN rdata_hash INTEGER")
+            self.cursor.execute("SELECT id, rdata FROM dns_records")
+            rows = [(rdata_digest(rdata), row_id) for row_id, rdata in self.cursor.fetchall()]
+            self.cursor.executemany("UPDATE dns_records SET rdata_hash = ? WHERE id = ?", rows)
+
+        self.cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.conn.commit()
 
     def create_dns_records_table(self):
         self.cursor.execute('''
-            CREATE TABLE dns_records (
+            CREATE TABLE IF NOT EXISTS dns_records (
                 id INTEGER PRIMARY KEY,
                 server TEXT,
                 zone TEXT,
@@ -42,145 +131,187 @@ class DatabaseManager:
                 type TEXT,
                 ttl INTEGER,
                 rdata TEXT,
-                created_at TIMESTAMP,
-                updated_at TIMESTAMP,
+                created_at INTEGER,
+                updated_at INTEGER,
                 last_operation TEXT
             )
         ''')
         self.conn.commit()
 
+    def create_dns_records_indexes(self):
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_dns_server_zone_op
+            ON dns_records (server, zone, last_operation)
+        ''')
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_dns_lookup
+            ON dns_records (server, zone, name, type)
+        ''')
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_dns_zone
+            ON dns_records (zone)
+        ''')
+        self.conn.commit()
+
     def check_and_create_zone_ownership_table(self):
         self.cursor.execute('''
             CREATE TABLE IF NOT EXISTS zone_ownership (
                 id INTEGER PRIMARY KEY,
                 zone TEXT UNIQUE,
                 owner TEXT,
-                created_at TIMESTAMP
+                created_at INTEGER
             )
         ''')
         self.conn.commit()
 
     def get_records(self, server_name, zone_name):
-        self.cursor.execute('''
-            SELECT name, type, ttl, rdata, last_operation
+        return self._iter_records('''
+            SELECT name, type, ttl, rdata, rdata_hash
             FROM dns_records
             WHERE server = ? AND zone = ? AND last_operation != 'DELETE'
         ''', (server_name, zone_name))
-        records = self.cursor.fetchall()
-        return [
-            DNSRecord(
-                name=record[0],
-                record_type=record[1],
-                ttl=record[2],
-                rdata=json.loads(record[3])
-            )
-            for record in records
-        ]
+
+    def get_zone_records(self, server_name, zone_name):
+        # active records and deleted keys for one zone in a single scan;
+        # tombstones are only ever tested for membership, so they skip
+        # DNSRecord and rdata entirely
+        records = []
+        deleted_keys = set()
+        for name, record_type, ttl, rdata, rdata_hash, operation in self.conn.execute('''
+            SELECT name, type, ttl, rdata, rdata_hash, last_operation
+            FROM dns_records
+            WHERE server = ? AND zone = ?
+        ''', (server_name, zone_name)):
+            if operation == 'DELETE':
+                deleted_keys.add((name, record_type, rdata_hash))
+            else:
+                records.append(DNSRecord(name=name, record_type=record_type, ttl=ttl, rdata_json=rdata, rdata_hash=rdata_hash))
+        return records, deleted_keys
+
+    def get_records_bulk(self, zones):
+        if not zones:
+            return {}
+        zones = list(set(zones))
+        records = {}
+        # batches keep each IN list under SQLite's bound-parameter limit;
+        # a zone never spans batches, so ORDER BY id still puts the newest
+        # row for a record last within its (server, zone) list
+        for start in range(0, len(zones), MAX_QUERY_PARAMS):
+            batch = zones[start:start + MAX_QUERY_PARAMS]
+            for server, zone, name, record_type, ttl, rdata, rdata_hash in self.conn.execute(f'''
+                SELECT server, zone, name, type, ttl, rdata, rdata_hash
+                FROM dns_records
+                WHERE zone IN ({', '.join('?' * len(batch))}) AND last_operation != 'DELETE'
+                ORDER BY id
+            ''', batch):
+                record = DNSRecord(name=name, record_type=record_type, ttl=ttl, rdata_json=rdata, rdata_hash=rdata_hash)
+                records.setdefault((server, zone), []).append(record)
+        return records
+
+    def _iter_records(self, query, params):
+        # a dedicated cursor lets callers stream rows while self.cursor is
+        # used for other statements
+        for name, record_type, ttl, rdata, rdata_hash in self.conn.execute(query, params):
+            yield DNSRecord(name=name, record_type=record_type, ttl=ttl, rdata_json=rdata, rdata_hash=rdata_hash)
 
     def add_or_update_record(self, server_name, zone_name, record):
-        now = datetime.now(timezone.utc)
-        self.cursor.execute('''
-            INSERT OR REPLACE INTO dns_records 
-            (server, zone, name, type, ttl, rdata, created_at, updated_at, last_operation)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'ADD')
-        ''', (
-            server_name,
-            zone_name,
-            record.name,
-            record.type,
-            record.ttl,
-            json.dumps(record.rdata),
-            now,
-            now
-        ))
-        self.conn.commit()
+        self.add_records_bulk(server_name, zone_name, [record])
+
+    def add_records_bulk(self, server_name, zone_name, records, now=None):
+        self._insert_records(server_name, zone_name, records, 'ADD', now)
+
+    def _insert_records(self, server_name, zone_name, records, operation, now=None):
+        now = now or time.time_ns()
+        rows = [
+            (server_name, zone_name, r.name, r.type, r.ttl, r.rdata_json, r.rdata_hash, now, now, operation)
+            for r in records
+        ]
+        self.cursor.executemany(INSERT_RECORD_SQL, rows)
 
     def delete_record(self, server_name, zone_name, record):
-        now = datetime.now(timezone.utc)
-        self.cursor.execute('''
-            UPDATE dns_records
-            SET updated_at = ?, last_operation = 'DELETE'
-            WHERE server = ? AND zone = ? AND name = ? AND type = ?
-        ''', (
+        now = time.time_ns()
+        self.cursor.execute(DELETE_RECORD_SQL, (
             now,
             server_name,
             zone_name,
             record.name,
             record.type
         ))
-        self.conn.commit()
 
     def get_deleted_records(self, server_name, zone_name):
-        self.cursor.execute('''
-            SELECT name, type, ttl, rdata
+        return self._iter_records('''
+            SELECT name, type, ttl, rdata, rdata_hash
             FROM dns_records
             WHERE server = ? AND zone = ? AND last_operation = 'DELETE'
         ''', (server_name, zone_name))
-        records = self.cursor.fetchall()
-        return [
-            DNSRecord(
-                name=record[0],
-                record_type=record[1],
-                ttl=record[2],
-                rdata=json.loads(record[3])
-            )
-            for record in records
-        ]
+
+    def get_deleted_keys(self, server_name, zone_name):
+        # same shape as DNSRecord.key
+        return set(self.conn.execute('''
+            SELECT name, type, rdata_hash
+            FROM dns_records
+            WHERE server = ? AND zone = ? AND last_operation = 'DELETE'
+        ''', (server_name, zone_name)))
 
     def get_zone_owner(self, zone):
         self.cursor.execute('SELECT owner FROM zone_ownership WHERE zone = ?', (zone,))
         result = self.cursor.fetchone()
         return result[0] if result else None
 
+    def get_all_zone_owners(self):
+        return dict(self.conn.execute('SELECT zone, owner FROM zone_ownership'))
+
     def set_zone_owner(self, zone, owner):
         zone_ownership = ZoneOwnership(zone, owner)
         self.cursor.execute('''
             INSERT OR REPLACE INTO zone_ownership (zone, owner, created_at)
             VALUES (?, ?, ?)
         ''', (zone_ownership.zone, zone_ownership.owner, zone_ownership.created_at))
-        self.conn.commit()
 
     def get_all_zones(self):
         self.cursor.execute('SELECT DISTINCT zone FROM dns_records')
         return [row[0] for row in self.cursor.fetchall()]
 
     def mark_record_as_deleted(self, server_name, zone_name, record):
-        now = datetime.now(timezone.utc)
-        self.cursor.execute('''
-            INSERT OR REPLACE INTO dns_records
-            (server, zone, name, type, ttl, rdata, created_at, updated_at, last_operation)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'DELETE')
-        ''', (
-            server_name,
-            zone_name,
-            record.name,
-            record.type,
-            record.ttl,
-            json.dumps(record.rdata),
-            now,
-            now
-        ))
-        self.conn.commit()
+        self.mark_records_as_deleted_bulk(server_name, zone_name, [record])
 
-    def check_and_create_zone_sync_table(self):
+    def mark_records_as_deleted_bulk(self, server_name, zone_name, records, now=None):
+        self._insert_records(server_name, zone_name, records, 'DELETE', now)
+
+    def check_and_create_zone_sync_table(self, version=SCHEMA_VERSION):
         self.cursor.execute('''
             CREATE TABLE IF NOT EXISTS zone_sync (
                 id INTEGER PRIMARY KEY,
                 zone TEXT,
                 server TEXT,
-                last_synced TIMESTAMP,
+                last_synced INTEGER,
                 UNIQUE(zone, server)
             )
         ''')
+        if version < 5:
+            # SOA serial the zone had when it was last synced. the column can
+            # already exist if an earlier upgrade died after this step but
+            # before user_version was bumped
+            self.cursor.execute("PRAGMA table_info(zone_sync)")
+            if 'soa_serial' not in {row[1] for row in self.cursor.fetchall()}:
+                self.cursor.execute("ALTER TABLE zone_sync ADD COLUMN soa_serial INTEGER")
         self.conn.commit()
 
-    def update_zone_sync(self, zone, server):
-        now = datetime.now(timezone.utc)
+    def update_zone_sync(self, zone, server, soa_serial=None):
+        now = time.time_ns()
         self.cursor.execute('''
-            INSERT OR REPLACE INTO zone_sync (zone, server, last_synced)
-            VALUES (?, ?, ?)
-        ''', (zone, server, now))
-        self.conn.commit()
+            INSERT OR REPLACE INTO zone_sync (zone, server, last_synced, soa_serial)
+            VALUES (?, ?, ?, ?)
+        ''', (zone, server, now, soa_serial))
+
+    def get_zone_serials(self):
+        return {
+            (zone, server): soa_serial
+            for zone, server, soa_serial in self.conn.execute('''
+                SELECT zone, server, soa_serial FROM zone_sync
+                WHERE soa_serial IS NOT NULL
+            ''')
+        }
 
     def get_zone_sync(self, zone, server):
         self.cursor.execute('''
@@ -192,13 +323,13 @@ class DatabaseManager:
     
     def close(self):
         if self.conn:
+            self.conn.execute("PRAGMA optimize")
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
             self.conn.close()
+            self.conn = None
 
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.close()
-
-    def __del__(self):
         self.close()
\ No newline at end of file
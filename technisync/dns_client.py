@@ -1,56 +1,87 @@
 import requests
 import logging
 import json
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException, Timeout
 import urllib3
+from urllib3.util.retry import Retry
+from .models import DNSRecord
+
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+_RDATA_FIELDS = {
+    'A': ('ipAddress',),
+    'AAAA': ('ipAddress',),
+    'CNAME': ('cname',),
+    'MX': ('preference', 'exchange'),
+    'NS': ('nameServer',),
+    'TXT': ('text',),
+    'SOA': ('primaryNameServer', 'responsiblePerson', 'serial', 'refresh', 'retry', 'expire', 'minimum'),
+    'PTR': ('ptrName',),
+}
+
 class TechnitiumDNSClient:
-    def __init__(self, server_url, api_key, verify_ssl=False):
+    def __init__(self, server_url, api_key, verify_ssl=False, max_concurrency=16):
         self.server_url = server_url
         self.api_key = api_key
         self.verify_ssl = verify_ssl
         self.logger = logging.getLogger(__name__)
+        self.max_concurrency = max_concurrency
+
+        self.session = requests.Session()
+        self.session.verify = verify_ssl
+        self.session.params = {'token': api_key}
+        self.session.headers['Accept-Encoding'] = 'gzip, deflate'
+        # keep one pooled keep-alive connection per concurrent caller so
+        # fan-out never opens and discards extra connections
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency, max_retries=Retry(3, backoff_factor=0.2))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
 
     def _make_request(self, endpoint, params=None, method='GET'):
         url = f"{self.server_url}{endpoint}"
         params = params or {}
-        params['token'] = self.api_key
         
         try:
             if method == 'GET':
-                response = requests.get(url, params=params, verify=self.verify_ssl)
+                response = self.session.get(url, params=params)
             elif method == 'POST':
-                response = requests.post(url, data=params, verify=self.verify_ssl)
+                response = self.session.post(url, data=params)
             response.raise_for_status()
-            data = response.json()
+            data = _json_loads(response.content)
             
             if data['status'] != 'ok':
                 raise Exception(f"API error: {data.get('errorMessage', 'Unknown error')}")
             
             return data.get('response', {})
         except RequestException as e:
-            self.logger.error(f"Network error in request to {url}: {e}")
+            self.logger.error("Network error in request to %s: %s", url, e)
             raise
         except Timeout as e:
-            self.logger.error(f"Timeout error in request to {url}: {e}")
+            self.logger.error("Timeout error in request to %s: %s", url, e)
             raise
         except json.JSONDecodeError as e:
-            self.logger.error(f"Error decoding JSON response from {url}: {e}")
+            self.logger.error("Error decoding JSON response from %s: %s", url, e)
             raise
         except KeyError as e:
-            self.logger.error(f"Unexpected response structure from {url}: {e}")
+            self.logger.error("Unexpected response structure from %s: %s", url, e)
             raise
         except Exception as e:
-            self.logger.error(f"Unexpected error in request to {url}: {e}")
+            self.logger.error("Unexpected error in request to %s: %s", url, e)
             raise
 
     def get_zones(self):
         return self._make_request('/api/zones/list')
 
     def get_records(self, domain):
-        return self._make_request('/api/zones/records/get', {'domain': domain, 'listZone': 'true'})
+        response = self._make_request('/api/zones/records/get', {'domain': domain, 'listZone': 'true'})
+        return [DNSRecord.from_dict(r) for r in response['records']]
 
     def add_record(self, zone, name, record_type, ttl, data):
         params = {
@@ -81,6 +112,32 @@ class TechnitiumDNSClient:
         params.update(self._format_rdata(record_type, data))
         return self._make_request('/api/zones/records/delete', params, method='POST')
 
+    def add_records_bulk(self, zone, records):
+        return self._run_bulk(self.add_record, [(zone, r.name, r.type, r.ttl, r.rdata) for r in records])
+
+    def update_records_bulk(self, zone, updates):
+        return self._run_bulk(self.update_record, [(zone, new.name, new.type, old.rdata, new.rdata) for old, new in updates])
+
+    def delete_records_bulk(self, zone, records):
+        return self._run_bulk(self.delete_record, [(zone, r.name, r.type, r.rdata) for r in records])
+
+    def _run_bulk(self, call, calls):
+        # the API has no multi-record endpoints, so pipeline single-record
+        # calls over the session's connection pool; returns the exception
+        # (or None) for each call, in order
+        if not calls:
+            return []
+        with ThreadPoolExecutor(max_workers=min(len(calls), self.max_concurrency)) as executor:
+            futures = [executor.submit(call, *args) for args in calls]
+        errors = []
+        for future in futures:
+            try:
+                future.result()
+                errors.append(None)
+            except Exception as e:
+                errors.append(e)
+        return errors
+
     def add_zone(self, zone_name):
         params = {
             'domain': zone_name,
@@ -90,29 +147,8 @@ class TechnitiumDNSClient:
 
     @staticmethod
     def _format_rdata(record_type, data, prefix=''):
-        formatted = {}
-        if record_type == 'A' or record_type == 'AAAA':
-            formatted[f'{prefix}ipAddress'] = data['ipAddress']
-        elif record_type == 'CNAME':
-            formatted[f'{prefix}cname'] = data['cname']
-        elif record_type == 'MX':
-            formatted[f'{prefix}preference'] = data['preference']
-            formatted[f'{prefix}exchange'] = data['exchange']
-        elif record_type == 'NS':
-            formatted[f'{prefix}nameServer'] = data['nameServer']
-        elif record_type == 'TXT':
-            formatted[f'{prefix}text'] = data['text']
-        elif record_type == 'SOA':
-            formatted[f'{prefix}primaryNameServer'] = data['primaryNameServer']
-            formatted[f'{prefix}responsiblePerson'] = data['responsiblePerson']
-            formatted[f'{prefix}serial'] = data['serial']
-            formatted[f'{prefix}refresh'] = data['refresh']
-            formatted[f'{prefix}retry'] = data['retry']
-            formatted[f'{prefix}expire'] = data['expire']
-            formatted[f'{prefix}minimum'] = data['minimum']
-        elif record_type == 'PTR':
-            formatted[f'{prefix}ptrName'] = data['ptrName']
-        return formatted
+        fields = _RDATA_FIELDS.get(record_type, ())
+        return {f'{prefix}{field}': data[field] for field in fields}
 
     def get_dhcp_scopes(self):
         return self._make_request('/api/dhcp/scopes/list')
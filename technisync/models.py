@@ -1,24 +1,73 @@
+import functools
+import hashlib
 import json
-from datetime import datetime, timezone
+import time
 import ipaddress
 
+# json.dumps builds a new encoder for every call with non-default options
+_CANONICAL_ENCODER = json.JSONEncoder(sort_keys=True, separators=(',', ':'))
+
+def canonical_rdata(rdata):
+    return _CANONICAL_ENCODER.encode(rdata)
+
+def rdata_digest(rdata_json):
+    # 64-bit digest of the canonical rdata, signed so it fits an SQLite INTEGER
+    digest = hashlib.blake2b(rdata_json.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little', signed=True)
+
 class DNSRecord:
-    def __init__(self, name, record_type, ttl, rdata):
+    __slots__ = ('name', 'type', 'ttl', '_rdata', '_rdata_json', '_rdata_hash', '_key')
+
+    def __init__(self, name, record_type, ttl, rdata=None, rdata_json=None, rdata_hash=None):
         self.name = name
         self.type = record_type
         self.ttl = ttl
-        self.rdata = rdata
+        self._rdata = rdata
+        self._rdata_json = rdata_json
+        self._rdata_hash = rdata_hash
+        self._key = None
+
+    @property
+    def rdata(self):
+        # records read back from the database only carry the stored JSON;
+        # decode it on first use instead of for every row
+        if self._rdata is None:
+            self._rdata = json.loads(self._rdata_json)
+        return self._rdata
+
+    @property
+    def rdata_json(self):
+        if self._rdata_json is None:
+            self._rdata_json = canonical_rdata(self._rdata)
+        return self._rdata_json
+
+    @property
+    def rdata_hash(self):
+        if self._rdata_hash is None:
+            self._rdata_hash = rdata_digest(self.rdata_json)
+        return self._rdata_hash
+
+    @property
+    def key(self):
+        # identity used to diff record sets; ttl is compared separately
+        if self._key is None:
+            self._key = (self.name, self.type, self.rdata_hash)
+        return self._key
 
     def __eq__(self, other):
         if not isinstance(other, DNSRecord):
             return False
+        # the digest is already computed for keying, so a mismatch settles
+        # it without comparing the rdata itself
+        if self.rdata_hash != other.rdata_hash:
+            return False
         return (self.name == other.name and
                 self.type == other.type and
                 self.ttl == other.ttl and
-                self.rdata == other.rdata)
+                self.rdata_json == other.rdata_json)
 
     def __hash__(self):
-        return hash((self.name, self.type, self.ttl, frozenset(self.rdata.items())))
+        return hash((self.name, self.type, self.ttl, self.rdata_hash))
 
     def to_dict(self):
         return {
@@ -59,19 +108,45 @@ class ZoneOwnership:
     def __init__(self, zone, owner, created_at=None):
         self.zone = zone
         self.owner = owner
-        self.created_at = created_at or datetime.now(timezone.utc)
+        self.created_at = created_at or time.time_ns()
 
     def __repr__(self):
         return f"ZoneOwnership(zone='{self.zone}', owner='{self.owner}', created_at={self.created_at})"
 
+INTERNAL_ZONES = frozenset({'0.in-addr.arpa', '127.in-addr.arpa', '255.in-addr.arpa', 'localhost'})
+
+@functools.lru_cache(maxsize=4096)
 def is_reverse_zone(zone_name):
-    return zone_name.endswith('.in-addr.arpa') or zone_name.endswith('.ip6.arpa')
+    return zone_name.endswith(('.in-addr.arpa', '.ip6.arpa'))
 
+@functools.lru_cache(maxsize=4096)
 def is_internal_zone(zone_name):
-    internal_zones = ['0.in-addr.arpa', '127.in-addr.arpa', '255.in-addr.arpa', 'localhost']
-    return zone_name in internal_zones or zone_name.endswith('.0.0.0.0.0.0.0.0.0.0.0.0.0.0.0.0.0.0.0.0.0.0.0.0.0.0.0.0.0.0.0.ip6.arpa')
+    return zone_name in INTERNAL_ZONES or zone_name.endswith('.0.0.0.0.0.0.0.0.0.0.0.0.0.0.0.0.0.0.0.0.0.0.0.0.0.0.0.0.0.0.0.ip6.arpa')
+
+def _dotted_quad_to_int(text):
+    parts = text.split('.') if isinstance(text, str) else ()
+    if len(parts) != 4 or any(not p.isdigit() or str(int(p)) != p or int(p) > 255 for p in parts):
+        return None
+    a, b, c, d = map(int, parts)
+    return (a << 24) | (b << 16) | (c << 8) | d
+
+def _netmask_to_int(subnet_mask):
+    if isinstance(subnet_mask, str) and subnet_mask.isdigit() and str(int(subnet_mask)) == subnet_mask:
+        prefix = int(subnet_mask)
+        return (0xffffffff << (32 - prefix)) & 0xffffffff if prefix <= 32 else None
+    mask = _dotted_quad_to_int(subnet_mask)
+    # only contiguous netmasks; anything else goes through ipaddress
+    if mask is None or (~mask & 0xffffffff) & ((~mask & 0xffffffff) + 1):
+        return None
+    return mask
 
+@functools.lru_cache(maxsize=1024)
 def get_reverse_zone_from_network(network_address, subnet_mask):
+    address = _dotted_quad_to_int(network_address)
+    mask = _netmask_to_int(subnet_mask)
+    if address is not None and mask is not None:
+        network = address & mask
+        return f"{(network >> 8) & 255}.{(network >> 16) & 255}.{network >> 24}.in-addr.arpa"
     try:
         network = ipaddress.IPv4Network(f"{network_address}/{subnet_mask}", strict=False)
         return f"{network.network_address.reverse_pointer.split('.', 1)[1]}"
@@ -1,8 +1,15 @@
 import logging
-import json
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 import ipaddress
-from .models import DNSRecord, Server, ZoneOwnership, is_reverse_zone, is_internal_zone, get_reverse_zone_from_network
+from .models import Server, ZoneOwnership, is_reverse_zone, is_internal_zone, get_reverse_zone_from_network
+
+CHANGE_ERRORS = {
+    'add': "Error adding record to server %s: %s",
+    'update': "Error updating record on server %s: %s",
+    'delete': "Error deleting record from server %s: %s",
+}
 
 class SyncManager:
     def __init__(self, config, db_manager, dns_clients):
@@ -10,29 +17,70 @@ class SyncManager:
         self.db_manager = db_manager
         self.dns_clients = dns_clients
         self.logger = logging.getLogger(__name__)
-        self.changes = {server.name: {} for server in config.SERVERS}
+        self.changes = {server.name: defaultdict(Counter) for server in config.SERVERS}
+        self._zones_cache = {}
+        self._records_cache = {}
+        self._zone_owners = None
+        # zones whose stored state changed, or whose last propagation
+        # failed, since the previous propagation pass
+        self._dirty_zones = set()
+        self._propagation_runs = 0
+        self.full_propagation_interval = 12
         self.ttl_threshold = 300
-        self.excluded_record_types = [
+        self.excluded_record_types = frozenset({
             'SOA', 'NS', 'RRSIG', 'NSEC', 'NSEC3', 'DNSKEY', 'DS',
             'CDS', 'CDNSKEY', 'TSIG', 'TKEY', 'AXFR', 'IXFR'
-        ]
+        })
 
     def sync(self):
-        for server in self.config.SERVERS:
-            self.logger.info(f"Syncing records for server: {server.name}")
-            try:
-                zones = self.dns_clients[server.name].get_zones()
-                self.logger.debug(f"Fetched zones for server {server.name}: {zones}")
+        workers = max(self.config.SYNC_WORKERS, len(self.config.SERVERS))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            zone_futures = {server.name: executor.submit(self.dns_clients[server.name].get_zones) for server in self.config.SERVERS}
+
+            # fan out one records fetch per (server, zone); results are
+            # applied on this thread since the sqlite connection isn't shared
+            record_futures = {}
+            reachable_servers = []
+            zone_serials = self.db_manager.get_zone_serials()
+            for server in self.config.SERVERS:
+                self.logger.info("Syncing records for server: %s", server.name)
+                try:
+                    zones = zone_futures[server.name].result()
+                except Exception as e:
+                    self.logger.error("Error syncing server %s: %s", server.name, e, exc_info=True)
+                    continue
+                self.logger.debug("Fetched zones for server %s: %s", server.name, zones)
+                reachable_servers.append(server)
+                self._zones_cache[server.name] = {zone['name'] for zone in zones.get('zones', [])}
                 for zone in zones.get('zones', []):
-                    if self.should_sync_zone(zone['name']):
-                        self.sync_zone(server.name, zone['name'])
-                
-                if self.config.SYNC_REVERSE_ZONES:
-                    self.sync_dhcp_scopes(server.name)
-            except Exception as e:
-                self.logger.error(f"Error syncing server {server.name}: {str(e)}", exc_info=True)
-
-        self.propagate_changes()
+                    zone_name = zone['name']
+                    if not self.should_sync_zone(zone_name):
+                        continue
+                    # an unchanged SOA serial means the records are exactly
+                    # what the last sync stored
+                    soa_serial = zone.get('soaSerial')
+                    if soa_serial is not None and zone_serials.get((zone_name, server.name)) == soa_serial:
+                        self.logger.debug("Skipping zone %s for server %s, SOA serial %s unchanged", zone_name, server.name, soa_serial)
+                        continue
+                    future = executor.submit(self.dns_clients[server.name].get_records, zone_name)
+                    record_futures[(server.name, zone_name)] = (future, soa_serial)
+
+            try:
+                # ownership only changes out of band, so read it once per run
+                self._zone_owners = self.db_manager.get_all_zone_owners()
+                with self.db_manager.transaction():
+                    for (server_name, zone_name), (future, soa_serial) in record_futures.items():
+                        self.sync_zone(server_name, zone_name, future, soa_serial)
+
+                    if self.config.SYNC_REVERSE_ZONES:
+                        for server in reachable_servers:
+                            self.sync_dhcp_scopes(server.name)
+
+                    self.propagate_changes()
+            finally:
+                self._zones_cache.clear()
+                self._records_cache.clear()
+                self._zone_owners = None
         self.log_sync_summary()
 
     def should_sync_zone(self, zone_name):
@@ -42,102 +90,164 @@ class SyncManager:
             return True 
         return zone_name in self.config.ZONES_TO_SYNC or (self.config.SYNC_REVERSE_ZONES and is_reverse_zone(zone_name))
 
-    def sync_zone(self, server_name, zone_name):
-        self.logger.info(f"Syncing zone {zone_name} for server {server_name}")
+    def sync_zone(self, server_name, zone_name, records_future=None, soa_serial=None):
+        self.logger.info("Syncing zone %s for server %s", zone_name, server_name)
         try:
             last_synced = self.db_manager.get_zone_sync(zone_name, server_name)
-            remote_records = self.dns_clients[server_name].get_records(zone_name)['records']
-            self.logger.debug(f"Fetched {len(remote_records)} remote records for zone {zone_name} on server {server_name}")
-            local_records = self.db_manager.get_records(server_name, zone_name)
-            deleted_records = self.db_manager.get_deleted_records(server_name, zone_name)
-            self.logger.debug(f"Fetched {len(local_records)} local records and {len(deleted_records)} deleted records for zone {zone_name} on server {server_name}")
-            self.process_records(server_name, zone_name, remote_records, local_records, deleted_records)
-            self.db_manager.update_zone_sync(zone_name, server_name)
+            if records_future is not None:
+                remote_records = records_future.result()
+            else:
+                remote_records = self.dns_clients[server_name].get_records(zone_name)
+            # propagation diffs against the same snapshot unless this sync
+            # changes the zone on the server
+            self._records_cache[(server_name, zone_name)] = remote_records
+            self.logger.debug("Fetched %d remote records for zone %s on server %s", len(remote_records), zone_name, server_name)
+            with self.db_manager.transaction():
+                local_records, deleted_keys = self.db_manager.get_zone_records(server_name, zone_name)
+                self.process_records(server_name, zone_name, remote_records, local_records, deleted_keys)
+                self.db_manager.update_zone_sync(zone_name, server_name, soa_serial)
         except Exception as e:
-            self.logger.error(f"Error syncing zone {zone_name} for server {server_name}: {str(e)}", exc_info=True)
+            self.logger.error("Error syncing zone %s for server %s: %s", zone_name, server_name, e, exc_info=True)
 
-    def process_records(self, server_name, zone_name, remote_records, local_records, deleted_records):
-        remote_dict = {self.record_key(DNSRecord.from_dict(r)): DNSRecord.from_dict(r) for r in remote_records if r['type'] not in self.excluded_record_types}
-        local_dict = {self.record_key(r): r for r in local_records if r.type not in self.excluded_record_types}
-        deleted_dict = {self.record_key(r): r for r in deleted_records}
+    def process_records(self, server_name, zone_name, remote_records, local_records, deleted_keys):
+        remote_dict = self.index_records(remote_records)
+        local_dict = self.index_records(local_records)
+        self.logger.debug("Loaded %d local records and %d deleted records for zone %s on server %s", len(local_dict), len(deleted_keys), zone_name, server_name)
+        remote_keys = remote_dict.keys()
+        local_keys = local_dict.keys()
+        to_store = []
+        to_mark_deleted = []
 
-        for key, remote_record in remote_dict.items():
-            if key in deleted_dict:
-                self.logger.debug(f"Deleting previously deleted record on {server_name} in zone {zone_name}: {remote_record}")
-                self.dns_clients[server_name].delete_record(zone_name, remote_record.name, remote_record.type, remote_record.rdata)
+        to_delete = []
+        for key in remote_keys & deleted_keys:
+            self.logger.debug("Deleting previously deleted record on %s in zone %s: %s", server_name, zone_name, remote_dict[key])
+            to_delete.append(remote_dict[key])
+        errors = self.dns_clients[server_name].delete_records_bulk(zone_name, to_delete)
+        for remote_record, error in zip(to_delete, errors):
+            if error is None:
                 self.track_change(server_name, zone_name, 'delete', remote_record)
-            elif key not in local_dict:
-                self.logger.debug(f"Adding record to local database for {server_name} in zone {zone_name}: {remote_record}")
-                self.db_manager.add_or_update_record(server_name, zone_name, remote_record)
-            elif not self.records_equal(remote_record, local_dict[key]):
-                self.logger.debug(f"Updating record in local database for {server_name} in zone {zone_name}: {remote_record}")
-                self.db_manager.add_or_update_record(server_name, zone_name, remote_record)
-
-        for key, local_record in local_dict.items():
-            if key not in remote_dict and key not in deleted_dict:
-                self.logger.debug(f"Marking record as deleted for {server_name} in zone {zone_name}: {local_record}")
-                self.db_manager.mark_record_as_deleted(server_name, zone_name, local_record)
-                self.track_change(server_name, zone_name, 'delete', local_record)
+        if any(error is None for error in errors):
+            self._records_cache.pop((server_name, zone_name), None)
+        for error in errors:
+            if error is not None:
+                raise error
+
+        for key in remote_keys - local_keys - deleted_keys:
+            self.logger.debug("Adding record to local database for %s in zone %s: %s", server_name, zone_name, remote_dict[key])
+            to_store.append(remote_dict[key])
+
+        for key in (remote_keys & local_keys) - deleted_keys:
+            if not self.records_equal(remote_dict[key], local_dict[key]):
+                self.logger.debug("Updating record in local database for %s in zone %s: %s", server_name, zone_name, remote_dict[key])
+                to_store.append(remote_dict[key])
+
+        for key in local_keys - remote_keys - deleted_keys:
+            local_record = local_dict[key]
+            self.logger.debug("Marking record as deleted for %s in zone %s: %s", server_name, zone_name, local_record)
+            to_mark_deleted.append(local_record)
+            self.track_change(server_name, zone_name, 'delete', local_record)
+
+        if to_delete or to_store or to_mark_deleted:
+            self._dirty_zones.add(zone_name)
+        self.db_manager.add_records_bulk(server_name, zone_name, to_store)
+        self.db_manager.mark_records_as_deleted_bulk(server_name, zone_name, to_mark_deleted)
 
     def propagate_changes(self):
         self.logger.info("Propagating changes across all servers")
-        zones_to_sync = self.db_manager.get_all_zones()
+        # only zones that changed need pushing out; every few runs do a full
+        # pass anyway to repair drift the diffs can't see
+        full_pass = self._propagation_runs % self.full_propagation_interval == 0
+        self._propagation_runs += 1
+        dirty_zones, self._dirty_zones = self._dirty_zones, set()
+        zones_to_sync = [
+            zone for zone in self.db_manager.get_all_zones()
+            if not is_internal_zone(zone) and (full_pass or zone in dirty_zones)
+        ]
+        self.logger.debug("Propagating %d zones (full pass: %s)", len(zones_to_sync), full_pass)
+        if not zones_to_sync:
+            return
+        records_by_zone = self.db_manager.get_records_bulk(zones_to_sync)
+        updates = []
         for zone in zones_to_sync:
-            if not is_internal_zone(zone):
-                zone_owner = self.db_manager.get_zone_owner(zone)
-                if zone_owner:
-                    owner_records = self.db_manager.get_records(zone_owner, zone)
-                    for server in self.config.SERVERS:
-                        if server.name != zone_owner:
-                            if is_reverse_zone(zone):
-                                self.ensure_reverse_zone_exists(server.name, zone)
-                            self.update_server_records(server.name, zone, owner_records, zone_owner)
-                else:
-                    all_records = self.get_all_records_for_zone(zone)
-                    for server in self.config.SERVERS:
-                        if is_reverse_zone(zone):
+            reverse = is_reverse_zone(zone)
+            zone_owner = self.get_zone_owner(zone)
+            if zone_owner:
+                owner_records = self.index_records(records_by_zone.get((zone_owner, zone), ()))
+                for server in self.config.SERVERS:
+                    if server.name != zone_owner:
+                        if reverse:
                             self.ensure_reverse_zone_exists(server.name, zone)
-                        self.update_server_records(server.name, zone, all_records, None)
+                        updates.append((server.name, zone, owner_records, zone_owner))
+            else:
+                all_records = self.get_all_records_for_zone(zone, records_by_zone)
+                for server in self.config.SERVERS:
+                    if reverse:
+                        self.ensure_reverse_zone_exists(server.name, zone)
+                    updates.append((server.name, zone, all_records, None))
 
-    def update_server_records(self, server_name, zone, target_records, zone_owner):
-        self.logger.info(f"Updating records for server {server_name} in zone {zone}")
+        # fetch every target's current records up front; the diffs and
+        # database reads stay on this thread
+        with ThreadPoolExecutor(max_workers=self.config.SYNC_WORKERS) as executor:
+            futures = [
+                None if (server_name, zone) in self._records_cache
+                else executor.submit(self.dns_clients[server_name].get_records, zone)
+                for server_name, zone, _, _ in updates
+            ]
+            for (server_name, zone, target_dict, zone_owner), future in zip(updates, futures):
+                self.update_server_records(server_name, zone, target_dict, zone_owner, future)
+
+    def update_server_records(self, server_name, zone, target_dict, zone_owner, records_future=None):
+        self.logger.info("Updating records for server %s in zone %s", server_name, zone)
         try:
-            current_records = self.dns_clients[server_name].get_records(zone)['records']
-            deleted_records = self.db_manager.get_deleted_records(server_name, zone)
+            current_records = self._records_cache.pop((server_name, zone), None)
+            if current_records is None:
+                if records_future is not None:
+                    current_records = records_future.result()
+                else:
+                    current_records = self.dns_clients[server_name].get_records(zone)
+            deleted_keys = self.db_manager.get_deleted_keys(server_name, zone)
         except Exception as e:
-            self.logger.error(f"Failed to get records for server {server_name} in zone {zone}: {str(e)}")
+            self.logger.error("Failed to get records for server %s in zone %s: %s", server_name, zone, e)
+            self._dirty_zones.add(zone)
             return
 
-        current_dict = {self.record_key(DNSRecord.from_dict(r)): DNSRecord.from_dict(r) for r in current_records if r['type'] not in self.excluded_record_types}
-        target_dict = {self.record_key(r): r for r in target_records if r.type not in self.excluded_record_types}
-        deleted_dict = {self.record_key(r): r for r in deleted_records}
+        current_dict = self.index_records(current_records)
 
-        for key, current_record in current_dict.items():
-            if key not in target_dict or key in deleted_dict:
-                self.logger.debug(f"Deleting record from server {server_name}: {current_record}")
-                try:
-                    self.dns_clients[server_name].delete_record(zone, current_record.name, current_record.type, current_record.rdata)
-                    self.track_change(server_name, zone, 'delete', current_record)
-                except Exception as e:
-                    self.logger.error(f"Error deleting record from server {server_name}: {str(e)}")
+        current_keys = current_dict.keys()
+        target_keys = target_dict.keys()
+
+        to_delete = []
+        for key in (current_keys - target_keys) | (current_keys & deleted_keys):
+            self.logger.debug("Deleting record from server %s: %s", server_name, current_dict[key])
+            to_delete.append(current_dict[key])
 
-        for key, record in target_dict.items():
-            if key in deleted_dict:
+        to_add = []
+        for key in target_keys - current_keys - deleted_keys:
+            self.logger.debug("Adding record to server %s: %s", server_name, target_dict[key])
+            to_add.append(target_dict[key])
+
+        to_update = []
+        for key in (target_keys & current_keys) - deleted_keys:
+            record = target_dict[key]
+            if self.records_equal(record, current_dict[key]):
                 continue
-            if key not in current_dict:
-                self.logger.debug(f"Adding record to server {server_name}: {record}")
-                try:
-                    self.dns_clients[server_name].add_record(zone, record.name, record.type, record.ttl, record.rdata)
-                    self.track_change(server_name, zone, 'add', record)
-                except Exception as e:
-                    self.logger.error(f"Error adding record to server {server_name}: {str(e)}")
-            elif not self.records_equal(record, current_dict[key]):
-                self.logger.debug(f"Updating record on server {server_name}: {record}")
-                try:
-                    self.dns_clients[server_name].update_record(zone, record.name, record.type, current_dict[key].rdata, record.rdata)
-                    self.track_change(server_name, zone, 'update', record)
-                except Exception as e:
-                    self.logger.error(f"Error updating record on server {server_name}: {str(e)}")
+            self.logger.debug("Updating record on server %s: %s", server_name, record)
+            to_update.append((current_dict[key], record))
+
+        # deletes go first so a replacement (e.g. a CNAME pointing somewhere
+        # new) never collides with the record it replaces
+        client = self.dns_clients[server_name]
+        self.apply_changes(server_name, zone, 'delete', to_delete, client.delete_records_bulk(zone, to_delete))
+        self.apply_changes(server_name, zone, 'add', to_add, client.add_records_bulk(zone, to_add))
+        self.apply_changes(server_name, zone, 'update', [new for _, new in to_update], client.update_records_bulk(zone, to_update))
+
+    def apply_changes(self, server_name, zone, change_type, records, errors):
+        for record, error in zip(records, errors):
+            if error is None:
+                self.track_change(server_name, zone, change_type, record)
+            else:
+                self.logger.error(CHANGE_ERRORS[change_type], server_name, error)
+                self._dirty_zones.add(zone)
 
     def sync_dhcp_scopes(self, server_name):
         try:
@@ -149,65 +259,74 @@ class SyncManager:
                         self.ensure_reverse_zone_exists(srv.name, reverse_zone)
                     self.sync_zone(server_name, reverse_zone)
         except Exception as e:
-            self.logger.error(f"Error syncing DHCP scopes for server {server_name}: {str(e)}", exc_info=True)
+            self.logger.error("Error syncing DHCP scopes for server %s: %s", server_name, e, exc_info=True)
 
     def ensure_reverse_zone_exists(self, server_name, zone):
         try:
-            zones = self.dns_clients[server_name].get_zones()
-            if zone not in [z['name'] for z in zones.get('zones', [])]:
-                self.logger.info(f"Creating reverse zone {zone} on server {server_name}")
+            zones = self._zones_cache.get(server_name)
+            if zones is None:
+                zones = {z['name'] for z in self.dns_clients[server_name].get_zones().get('zones', [])}
+                self._zones_cache[server_name] = zones
+            if zone not in zones:
+                self.logger.info("Creating reverse zone %s on server %s", zone, server_name)
                 self.dns_clients[server_name].add_zone(zone)
+                zones.add(zone)
+                self._dirty_zones.add(zone)
                 self.track_change(server_name, zone, 'add', {'type': 'ZONE'})
         except Exception as e:
-            self.logger.error(f"Error ensuring reverse zone {zone} exists on server {server_name}: {str(e)}")
+            self.logger.error("Error ensuring reverse zone %s exists on server %s: %s", zone, server_name, e)
 
-    def get_all_records_for_zone(self, zone):
+    def get_all_records_for_zone(self, zone, records_by_zone):
         all_records = {}
         for server in self.config.SERVERS:
-            records = self.db_manager.get_records(server.name, zone)
-            for record in records:
-                if record.type not in self.excluded_record_types:
-                    key = self.record_key(record)
-                    all_records[key] = record
-        return list(all_records.values())
+            all_records.update(self.index_records(records_by_zone.get((server.name, zone), ())))
+        return all_records
+
+    def index_records(self, records):
+        excluded = self.excluded_record_types
+        return {self.record_key(r): r for r in records if r.type not in excluded}
 
     def track_change(self, server_name, zone_name, change_type, record):
-        if zone_name not in self.changes[server_name]:
-            self.changes[server_name][zone_name] = {'add': 0, 'update': 0, 'delete': 0}
         self.changes[server_name][zone_name][change_type] += 1
 
     def log_sync_summary(self):
             self.logger.info("=== Sync Summary ===")
-            changes_made = False
+            if not any(self.changes.values()):
+                self.logger.info("No changes were made during this sync.")
+                self.logger.info("=== End of Sync Summary ===")
+                return
+
             for server_name, server_changes in self.changes.items():
                 if server_changes:
-                    changes_made = True
-                    self.logger.info(f"Changes for server {server_name}:")
+                    self.logger.info("Changes for server %s:", server_name)
                     for zone, changes in server_changes.items():
-                        self.logger.info(f"  Zone {zone}:")
+                        self.logger.info("  Zone %s:", zone)
                         for change_type, count in changes.items():
                             if count > 0:
-                                self.logger.info(f"    {change_type.capitalize()}: {count}")
+                                self.logger.info("    %s: %d", change_type.capitalize(), count)
                 else:
-                    self.logger.info(f"No changes for server {server_name}")
-            
-            if not changes_made:
-                self.logger.info("No changes were made during this sync.")
+                    self.logger.info("No changes for server %s", server_name)
             
             self.logger.info("=== End of Sync Summary ===")
-            self.changes = {server.name: {} for server in self.config.SERVERS}
+            for server_changes in self.changes.values():
+                server_changes.clear()
 
     def record_key(self, record):
-        return (record.name, record.type, json.dumps(record.rdata, sort_keys=True))
+        return record.key
     
     def records_equal(self, record1, record2):
         return (self.record_key(record1) == self.record_key(record2) and
                 abs(record1.ttl - record2.ttl) < self.ttl_threshold)
 
+    def get_zone_owner(self, zone):
+        if self._zone_owners is None:
+            return self.db_manager.get_zone_owner(zone)
+        return self._zone_owners.get(zone)
+
     def get_reverse_zone_owner(self, ip_address):
         reverse_zone = self.ip_to_reverse_zone(ip_address)
         if reverse_zone:
-            return self.db_manager.get_zone_owner(reverse_zone)
+            return self.get_zone_owner(reverse_zone)
         return None
 
     @staticmethod
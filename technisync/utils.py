@@ -1,21 +1,23 @@
 import logging
+import queue
 import re
+from logging.handlers import QueueHandler, QueueListener
 
-class SensitiveFormatter(logging.Formatter):
-    def __init__(self, fmt=None, datefmt=None, style='%'):
-        super().__init__(fmt, datefmt, style)
-        self.sensitive_patterns = [
-            (re.compile(r'token=[^&\s]+'), 'token=[REDACTED]'),
-            (re.compile(r'api_key=[^&\s]+'), 'api_key=[REDACTED]'),
-        ]
+_SENSITIVE_RE = re.compile(r'(token|api_key)=[^&\s]+')
 
+class SensitiveFormatter(logging.Formatter):
     def format(self, record):
         message = super().format(record)
-        for pattern, replacement in self.sensitive_patterns:
-            message = pattern.sub(replacement, message)
-        return message
+        if 'token=' not in message and 'api_key=' not in message:
+            return message
+        return _SENSITIVE_RE.sub(r'\1=[REDACTED]', message)
 
 def setup_logging(log_level, log_file='technisync.log'):
+    # none of the formatters use thread or process fields
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
     logger = logging.getLogger()
     logger.setLevel(log_level)
 
@@ -23,8 +25,16 @@ def setup_logging(log_level, log_file='technisync.log'):
 
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
 
     file_handler = logging.FileHandler(log_file)
     file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
\ No newline at end of file
+
+    # QueueHandler still merges args and renders tracebacks on the calling
+    # thread; redaction and the console/file writes happen on the
+    # listener's thread. the caller owns the listener and must stop() it
+    # to flush
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(log_queue))
+    listener = QueueListener(log_queue, console_handler, file_handler, respect_handler_level=True)
+    listener.start()
+    return listener
\ No newline at end of file